@@ -11,17 +11,87 @@ based machine respectively. Each entry being represented as an instance
 of the HostsEntry class.
 """
 
+import re
 import sys
 
 try:
     from urllib.request import urlopen
 except ImportError:  # pragma: no cover
     from urllib2 import urlopen
-from python_hosts.utils import (is_ipv4, is_ipv6, is_readable, valid_hostnames,
-                                dedupe_list)
+from python_hosts.utils import is_ipv4, is_ipv6, is_readable, valid_hostnames
 from python_hosts.exception import (InvalidIPv6Address, InvalidIPv4Address,
                                     UnableToWriteHosts)
 
+_WINDOWS_HOSTS_PATH = r"c:\windows\system32\drivers\etc\hosts"
+_POSIX_HOSTS_PATH = '/etc/hosts'
+_DEFAULT_HOSTS_PATH = _WINDOWS_HOSTS_PATH if sys.platform.startswith('win') else _POSIX_HOSTS_PATH
+
+_LINE_RE = re.compile(r'\s*(?:(#)|(\S+)(.*))?')
+
+# The address families a token could belong to, keyed by its first character
+_IPV4 = 1
+_IPV6 = 2
+_FIRST_CHAR_FAMILIES = dict.fromkeys('0123456789', _IPV4 | _IPV6)
+_FIRST_CHAR_FAMILIES.update(dict.fromkeys('abcdefABCDEF:', _IPV6))
+
+
+def _address_type(address):
+    """
+    Return the type of the supplied address, only calling the validator for
+    the address family its characters could belong to
+    :param address: A string representation of an IP address
+    :return: 'ipv4' | 'ipv6' | None
+    """
+    families = _FIRST_CHAR_FAMILIES.get(address[:1], 0)
+    colons = address.count(':')
+    if colons:
+        # Every IPv6 address, including '::', has at least two colons
+        if colons > 1 and families & _IPV6 and is_ipv6(address):
+            return 'ipv6'
+    elif families & _IPV4 and is_ipv4(address):
+        return 'ipv4'
+
+
+def _split_lines(contents):
+    """
+    Split text read from a file into lines on newlines only, as
+    str.splitlines would also break lines on form feeds, vertical tabs and
+    unicode line separators
+    :param contents: Text read from a file opened in text mode
+    :return: A list of lines without their trailing newlines
+    """
+    lines = contents.split('\n')
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def _classify_line(hosts_entry):
+    """
+    Split a line from a hosts file into its type, address and names using
+    a single match of _LINE_RE
+    :param hosts_entry: A line from the hosts file
+    :return: A tuple of the entry type, the address and the unsplit names
+    """
+    is_comment, address, names = _LINE_RE.match(hosts_entry).groups()
+    if is_comment:
+        return 'comment', None, None
+    if address:
+        return _address_type(address), address, names
+    return 'blank', None, None
+
+
+def _format_address_line(entry):
+    return "{0}\t{1}\n".format(entry.address, ' '.join(entry.names))
+
+
+_LINE_FORMATTERS = {
+    'ipv4': _format_address_line,
+    'ipv6': _format_address_line,
+    'comment': lambda entry: entry.comment + "\n",
+    'blank': lambda entry: "\n",
+}
+
 
 class HostsEntry(object):
     """ An entry in a hosts file. """
@@ -66,9 +136,35 @@ class HostsEntry(object):
         self.comment = comment
         self.names = names
 
+    @classmethod
+    def _from_valid_address(cls, entry_type, address, names):
+        """
+        Create an ipv4 or ipv6 entry for an address that has already been
+        validated, without repeating the address check made by __init__
+        :param entry_type: ipv4 | ipv6
+        :param address: The validated address
+        :param names: The names that resolve to the address
+        :return: An instance of HostsEntry
+        """
+        if not names:
+            raise Exception('Address and Name(s) must be specified.')
+        entry = cls.__new__(cls)
+        entry.entry_type = entry_type
+        entry.address = address
+        entry.comment = None
+        entry.names = names
+        return entry
+
     def is_real_entry(self):
         return self.entry_type in ('ipv4', 'ipv6')
 
+    def _to_line(self):
+        """
+        Return the entry formatted as a line of a hosts file
+        :return: A newline terminated string
+        """
+        return _LINE_FORMATTERS[self.entry_type](self)
+
     def __repr__(self):
         return "HostsEntry(entry_type=\'{0}\', address=\'{1}\', " \
                "comment={2}, names={3})".format(self.entry_type,
@@ -94,16 +190,7 @@ class HostsEntry(object):
         :return: 'comment' | 'blank' | 'ipv4' | 'ipv6'
         """
         if hosts_entry and isinstance(hosts_entry, str):
-            entry = hosts_entry.strip()
-            if not entry or not entry[0] or entry[0] == "\n":
-                return 'blank'
-            if entry[0] == "#":
-                return 'comment'
-            entry_chunks = entry.split()
-            if is_ipv6(entry_chunks[0]):
-                return 'ipv6'
-            if is_ipv4(entry_chunks[0]):
-                return 'ipv4'
+            return _classify_line(hosts_entry)[0]
 
     @staticmethod
     def str_to_hostentry(entry):
@@ -113,21 +200,53 @@ class HostsEntry(object):
         :return: An instance of HostsEntry
         """
         line_parts = entry.strip().split()
-        if is_ipv4(line_parts[0]) and valid_hostnames(line_parts[1:]):
-            return HostsEntry(entry_type='ipv4',
-                              address=line_parts[0],
-                              names=line_parts[1:])
-        elif is_ipv6(line_parts[0]) and valid_hostnames(line_parts[1:]):
-            return HostsEntry(entry_type='ipv6',
-                              address=line_parts[0],
-                              names=line_parts[1:])
+        entry_type = _address_type(line_parts[0])
+        if entry_type and valid_hostnames(line_parts[1:]):
+            return HostsEntry._from_valid_address(entry_type,
+                                                  line_parts[0],
+                                                  line_parts[1:])
         else:
             return False
 
 
+def _build_address_entry(entry_type, address, names):
+    return HostsEntry._from_valid_address(entry_type, address, names.split())
+
+
+_ENTRY_BUILDERS = {
+    'comment': lambda hosts_entry, address, names: HostsEntry(entry_type="comment", comment=hosts_entry),
+    'blank': lambda hosts_entry, address, names: HostsEntry(entry_type="blank"),
+    'ipv4': lambda hosts_entry, address, names: _build_address_entry('ipv4', address, names),
+    'ipv6': lambda hosts_entry, address, names: _build_address_entry('ipv6', address, names),
+}
+
+
+def _parse_import_lines(lines):
+    """
+    Convert the lines of an imported hosts file into instances of HostsEntry
+    in a single pass, ignoring blank lines, comments and trailing comments
+    :param lines: A list of lines from the imported hosts file
+    :return: A tuple of the entries, the skipped count and the invalid count
+    """
+    import_entries = []
+    skipped = 0
+    invalid_count = 0
+    for line in lines:
+        line = line.partition('#')[0].strip()
+        if not line:
+            skipped += 1
+            continue
+        import_entry = HostsEntry.str_to_hostentry(line)
+        if import_entry:
+            import_entries.append(import_entry)
+        else:
+            invalid_count += 1
+    return import_entries, skipped, invalid_count
+
+
 class Hosts(object):
     """ A hosts file. """
-    __slots__ = ['entries', 'hosts_path']
+    __slots__ = ['entries', 'hosts_path', '_dirty']
 
     def __init__(self, path=None):
         """
@@ -142,6 +261,18 @@ class Hosts(object):
         else:
             self.hosts_path = self.determine_hosts_path()
         self.populate_entries()
+        self._dirty = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Write the entries back to the hosts file when leaving a with block,
+        unless the block raised an exception
+        """
+        if exc_type is None:
+            self.write()
 
     def __repr__(self):
         return 'Hosts(hosts_path=\'{0}\', entries={1})'.format(self.hosts_path, self.entries)
@@ -167,12 +298,11 @@ class Hosts(object):
         :return: detected filesystem path of the hosts file
         """
         if not platform:
-            platform = sys.platform
+            return _DEFAULT_HOSTS_PATH
         if platform.startswith('win'):
-            result = r"c:\windows\system32\drivers\etc\hosts"
-            return result
+            return _WINDOWS_HOSTS_PATH
         else:
-            return '/etc/hosts'
+            return _POSIX_HOSTS_PATH
 
     def write(self, path=None):
         """
@@ -180,45 +310,35 @@ class Hosts(object):
         :param path: override the write path
         :return: Dictionary containing counts
         """
-        written_count = 0
-        comments_written = 0
-        blanks_written = 0
-        ipv4_entries_written = 0
-        ipv6_entries_written = 0
         if path:
             output_file_path = path
         else:
             output_file_path = self.hosts_path
+        content = ''.join(entry._to_line() for entry in self.entries)
         try:
             with open(output_file_path, 'w') as hosts_file:
-                for written_count, line in enumerate(self.entries):
-                    if line.entry_type == 'comment':
-                        hosts_file.write(line.comment + "\n")
-                        comments_written += 1
-                    if line.entry_type == 'blank':
-                        hosts_file.write("\n")
-                        blanks_written += 1
-                    if line.entry_type == 'ipv4':
-                        hosts_file.write(
-                            "{0}\t{1}\n".format(
-                                line.address,
-                                ' '.join(line.names),
-                            )
-                        )
-                        ipv4_entries_written += 1
-                    if line.entry_type == 'ipv6':
-                        hosts_file.write(
-                            "{0}\t{1}\n".format(
-                                line.address,
-                                ' '.join(line.names), ))
-                        ipv6_entries_written += 1
+                hosts_file.write(content)
         except:
             raise UnableToWriteHosts()
-        return {'total_written': written_count + 1,
-                'comments_written': comments_written,
-                'blanks_written': blanks_written,
-                'ipv4_entries_written': ipv4_entries_written,
-                'ipv6_entries_written': ipv6_entries_written}
+        if output_file_path == self.hosts_path:
+            self._dirty = False
+        entry_types = [entry.entry_type for entry in self.entries]
+        return {'total_written': len(entry_types),
+                'comments_written': entry_types.count('comment'),
+                'blanks_written': entry_types.count('blank'),
+                'ipv4_entries_written': entry_types.count('ipv4'),
+                'ipv6_entries_written': entry_types.count('ipv6')}
+
+    def flush(self):
+        """
+        Write the entries back to the hosts file if add or remove_all_matching
+        have changed them since it was read or last written. Changes made by
+        modifying the entries list directly are not tracked, so use write()
+        after making those.
+        :return: Dictionary containing counts, or None if nothing was written
+        """
+        if self._dirty:
+            return self.write()
 
     @staticmethod
     def get_hosts_by_url(url=None):
@@ -238,14 +358,14 @@ class Hosts(object):
         :param comment: A comment to search for
         :return: True if a supplied address, name, or comment is found. Otherwise, False.
         """
+        if names:
+            names = set(names)
         for entry in self.entries:
             if entry.entry_type in ('ipv4', 'ipv6'):
                 if address and address == entry.address:
                     return True
-                if names:
-                    for name in names:
-                        if name in entry.names:
-                            return True
+                if names and not names.isdisjoint(entry.names):
+                    return True
             elif entry.entry_type == 'comment' and entry.comment == comment:
                 return True
         return False
@@ -267,7 +387,28 @@ class Hosts(object):
                 func = lambda entry: not entry.is_real_entry() or name not in entry.names
             else:
                 raise ValueError('No address or name was specified for removal.')
-            self.entries = list(filter(func, self.entries))
+            self._keep_entries(func)
+
+    def _remove_all_matching_names(self, names):
+        """
+        Remove all HostsEntry instances from the Hosts object where any of
+        the supplied names match, in a single pass over the entries
+        :param names: A list of host names
+        :return: None
+        """
+        names = set(names)
+        self._keep_entries(lambda entry: not entry.is_real_entry() or names.isdisjoint(entry.names))
+
+    def _keep_entries(self, func):
+        """
+        Rebuild the list of entries, keeping those for which func is True
+        :param func: A function taking a HostsEntry and returning a boolean
+        :return: None
+        """
+        remaining = list(filter(func, self.entries))
+        if len(remaining) != len(self.entries):
+            self._dirty = True
+        self.entries = remaining
 
     def import_url(self, url=None, force=None):
         """
@@ -280,18 +421,7 @@ class Hosts(object):
         file_contents = file_contents.rstrip().replace('^M', '\n')
         file_contents = file_contents.rstrip().replace('\r\n', '\n')
         lines = file_contents.split('\n')
-        skipped = 0
-        import_entries = []
-        for line in lines:
-            stripped_entry = line.strip()
-            if (not stripped_entry) or (stripped_entry.startswith('#')):
-                skipped += 1
-            else:
-                line = line.partition('#')[0]
-                line = line.rstrip()
-                import_entry = HostsEntry.str_to_hostentry(line)
-                if import_entry:
-                    import_entries.append(import_entry)
+        import_entries, skipped, _ = _parse_import_lines(lines)
         add_result = self.add(entries=import_entries, force=force)
         write_result = self.write()
         return {'result': 'success',
@@ -306,23 +436,10 @@ class Hosts(object):
         :param import_file_path: The path to the file containing the host entries
         :return: Counts reflecting the attempted additions
         """
-        skipped = 0
-        invalid_count = 0
         if is_readable(import_file_path):
-            import_entries = []
             with open(import_file_path, 'r') as infile:
-                for line in infile:
-                    stripped_entry = line.strip()
-                    if (not stripped_entry) or (stripped_entry.startswith('#')):
-                        skipped += 1
-                    else:
-                        line = line.partition('#')[0]
-                        line = line.rstrip()
-                        import_entry = HostsEntry.str_to_hostentry(line)
-                        if import_entry:
-                            import_entries.append(import_entry)
-                        else:
-                            invalid_count += 1
+                lines = _split_lines(infile.read())
+            import_entries, skipped, invalid_count = _parse_import_lines(lines)
             add_result = self.add(entries=import_entries)
             write_result = self.write()
             return {'result': 'success',
@@ -350,12 +467,13 @@ class Hosts(object):
         duplicate_count = 0
         replaced_count = 0
         import_entries = []
-        existing_addresses = [x.address for x in self.entries if x.address]
-        existing_names = []
+        existing_addresses = set()
+        existing_names = set()
         for item in self.entries:
+            if item.address:
+                existing_addresses.add(item.address)
             if item.names:
-                existing_names.extend(item.names)
-        existing_names = dedupe_list(existing_names)
+                existing_names.update(item.names)
         for entry in entries:
             if entry.entry_type == 'comment':
                 entry.comment = entry.comment.strip()
@@ -364,10 +482,9 @@ class Hosts(object):
                 import_entries.append(entry)
             elif entry.address in ('0.0.0.0', '127.0.0.1') or allow_address_duplication:
                 # Allow duplicates entries for addresses used for adblocking
-                if set(entry.names).intersection(existing_names):
+                if not existing_names.isdisjoint(entry.names):
                     if force:
-                        for name in entry.names:
-                            self.remove_all_matching(name=name)
+                        self._remove_all_matching_names(entry.names)
                         import_entries.append(entry)
                     else:
                         duplicate_count += 1
@@ -394,12 +511,11 @@ class Hosts(object):
                     self.remove_all_matching(address=entry.address)
                     replaced_count += 1
                     import_entries.append(entry)
-            elif set(entry.names).intersection(existing_names):
+            elif not existing_names.isdisjoint(entry.names):
                 if not force:
                     duplicate_count += 1
                 else:
-                    for name in entry.names:
-                        self.remove_all_matching(name=name)
+                    self._remove_all_matching_names(entry.names)
                     replaced_count += 1
                     import_entries.append(entry)
             else:
@@ -415,6 +531,8 @@ class Hosts(object):
             elif item.entry_type == 'ipv6':
                 ipv6_count += 1
                 self.entries.append(item)
+        if comment_count or ipv4_count or ipv6_count:
+            self._dirty = True
         return {'comment_count': comment_count,
                 'ipv4_count': ipv4_count,
                 'ipv6_count': ipv6_count,
@@ -430,25 +548,12 @@ class Hosts(object):
         """
         try:
             with open(self.hosts_path, 'r') as hosts_file:
-                hosts_entries = [line for line in hosts_file]
-                for hosts_entry in hosts_entries:
-                    entry_type = HostsEntry.get_entry_type(hosts_entry)
-                    if entry_type == "comment":
-                        hosts_entry = hosts_entry.replace("\r", "")
-                        hosts_entry = hosts_entry.replace("\n", "")
-                        self.entries.append(HostsEntry(entry_type="comment",
-                                                       comment=hosts_entry))
-                    elif entry_type == "blank":
-                        self.entries.append(HostsEntry(entry_type="blank"))
-                    elif entry_type in ("ipv4", "ipv6"):
-                        chunked_entry = hosts_entry.split()
-                        stripped_name_list = [name.strip() for name in chunked_entry[1:]]
-
-                        self.entries.append(
-                            HostsEntry(
-                                entry_type=entry_type,
-                                address=chunked_entry[0].strip(),
-                                names=stripped_name_list))
+                hosts_entries = _split_lines(hosts_file.read())
+            for hosts_entry in hosts_entries:
+                entry_type, address, names = _classify_line(hosts_entry)
+                builder = _ENTRY_BUILDERS.get(entry_type)
+                if builder:
+                    self.entries.append(builder(hosts_entry, address, names))
         except IOError:
             return {'result': 'failed',
                     'message': 'Cannot read: {0}.'.format(self.hosts_path)}
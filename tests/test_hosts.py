@@ -643,3 +643,110 @@ def test_remove_all_matching_failure(tmpdir):
         hosts = Hosts(path=hosts_file.strpath)
         hosts.remove_all_matching()
         hosts.write()
+
+
+def test_context_manager_writes_on_exit(tmpdir):
+    """
+    Test that entries added within a with block are written once the block exits
+    """
+    hosts_file = tmpdir.mkdir("etc").join("hosts")
+    hosts_file.write("82.132.132.132\texample.com\texample\n")
+    with Hosts(path=hosts_file.strpath) as hosts:
+        new_entry = HostsEntry(entry_type='ipv4', address='1.2.3.4', names=['something.com'])
+        hosts.add(entries=[new_entry])
+    assert hosts_file.read() == "82.132.132.132\texample.com example\n1.2.3.4\tsomething.com\n"
+
+
+def test_context_manager_does_not_write_on_exception(tmpdir):
+    """
+    Test that entries are not written if the with block raises an exception
+    """
+    hosts_file = tmpdir.mkdir("etc").join("hosts")
+    hosts_file.write("82.132.132.132\texample.com\texample\n")
+    with pytest.raises(ValueError):
+        with Hosts(path=hosts_file.strpath) as hosts:
+            hosts.remove_all_matching(address='82.132.132.132')
+            raise ValueError()
+    assert hosts_file.read() == "82.132.132.132\texample.com\texample\n"
+
+
+def test_lines_are_only_split_on_newlines(tmpdir):
+    """
+    Test that form feeds and unicode line separators within a line are preserved
+    """
+    hosts_file = tmpdir.mkdir("etc").join("hosts")
+    hosts_file.write_text(u"# note\x0cmore text\n# caf\u2028e tail\n1.2.3.4 a.com\x0cb.com\n", encoding='utf-8')
+    hosts = Hosts(path=hosts_file.strpath)
+    assert hosts.count() == 3
+    assert hosts.entries[0].comment == u"# note\x0cmore text"
+    assert hosts.entries[1].comment == u"# caf\u2028e tail"
+    assert hosts.entries[2].names == ['a.com', 'b.com']
+
+
+def test_names_modified_in_place_are_written(tmpdir):
+    """
+    Test that changes made to an entry's names list after a write are
+    included in the next write
+    """
+    hosts_file = tmpdir.mkdir("etc").join("hosts")
+    hosts_file.write("1.2.3.4\texample.com\n")
+    hosts = Hosts(path=hosts_file.strpath)
+    hosts.write()
+    hosts.entries[0].names.append('added.com')
+    hosts.write()
+    assert hosts_file.read() == "1.2.3.4\texample.com added.com\n"
+def test_flush_only_writes_when_changed(tmpdir):
+    """
+    Test that flush does not rewrite the hosts file unless entries were changed
+    """
+    hosts_file = tmpdir.mkdir("etc").join("hosts")
+    hosts_file.write("82.132.132.132\texample.com\texample\n")
+    hosts = Hosts(path=hosts_file.strpath)
+    assert hosts.flush() is None
+    assert hosts_file.read() == "82.132.132.132\texample.com\texample\n"
+    duplicate_entry = HostsEntry(entry_type='ipv4', address='82.132.132.132', names=['example.com'])
+    hosts.add(entries=[duplicate_entry])
+    assert hosts.flush() is None
+    hosts.remove_all_matching(name='example')
+    assert hosts.flush().get('total_written') == 0
+    assert not hosts_file.read()
+    assert hosts.flush() is None
+
+
+def test_import_file_only_splits_on_newlines(tmpdir):
+    """
+    Test that a form feed within an imported line separates names rather than lines
+    """
+    hosts_file = tmpdir.mkdir("etc").join("hosts")
+    hosts_file.write("")
+    import_file = tmpdir.mkdir("input").join("infile")
+    import_file.write("1.2.3.4 a.com\x0cb.com\n")
+    hosts = Hosts(path=hosts_file.strpath)
+    feedback = hosts.import_file(import_file_path=import_file.strpath)
+    assert feedback.get('invalid_count') == 0
+    assert feedback.get('skipped') == 0
+    assert hosts.entries[0].names == ['a.com', 'b.com']
+
+
+def test_write_does_not_truncate_file_if_an_entry_cannot_be_formatted(tmpdir):
+    """
+    Test that the existing hosts file is left intact if an entry fails to format
+    """
+    hosts_file = tmpdir.mkdir("etc").join("hosts")
+    hosts_file.write("1.2.3.4\texample.com\n5.6.7.8\texample.org\n")
+    hosts = Hosts(path=hosts_file.strpath)
+    hosts.entries.append(HostsEntry(entry_type='ipv4', address='9.9.9.9', names=[None]))
+    with pytest.raises(TypeError):
+        hosts.write()
+    assert hosts_file.read() == "1.2.3.4\texample.com\n5.6.7.8\texample.org\n"
+
+
+def test_context_manager_writes_direct_changes_on_exit(tmpdir):
+    """
+    Test that changes made directly to an entry within a with block are written on exit
+    """
+    hosts_file = tmpdir.mkdir("etc").join("hosts")
+    hosts_file.write("1.2.3.4\texample.com\n")
+    with Hosts(path=hosts_file.strpath) as hosts:
+        hosts.entries[0].names.append('added.com')
+    assert hosts_file.read() == "1.2.3.4\texample.com added.com\n"
@@ -54,3 +54,24 @@ def test_hostentry_comment_str():
 def test_hostentry_blank_str():
     an_entry = HostsEntry(entry_type='blank', address=None, comment=None, names=None)
     assert (str(an_entry)) == "TYPE = blank"
+
+
+def test_str_to_hostentry_rejects_address_of_wrong_family():
+    assert not HostsEntry.str_to_hostentry('example.com:80 example.com')
+    assert not HostsEntry.str_to_hostentry('abc.def.ghi.jkl example.com')
+
+
+def test_hostentry_has_no_instance_dict():
+    an_entry = HostsEntry(entry_type='ipv4', address='1.2.3.4', names=['example.com'])
+    assert not hasattr(an_entry, '__dict__')
+
+
+def test_str_to_hostentry_ipv6_with_leading_colons_and_hex():
+    assert HostsEntry.str_to_hostentry('::1 localhost').entry_type == 'ipv6'
+    assert HostsEntry.str_to_hostentry('fe80::1 example.com').entry_type == 'ipv6'
+    assert not HostsEntry.str_to_hostentry('zz80::1 example.com')
+
+
+def test_get_entry_type_rejects_single_colon():
+    assert not HostsEntry.get_entry_type('1:2 example.com')
+    assert HostsEntry.get_entry_type(':: example.com') == 'ipv6'
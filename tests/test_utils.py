@@ -52,3 +52,11 @@ def test_hostname_validation_failure_with_leading_hyphen():
     Test function returns False if a hostname with a leading hyphen is specified
     """
     assert not valid_hostnames(['example.com', '-example'])
+
+
+def test_hostname_validation_failure_with_long_label():
+    """
+    Test function returns False if a hostname has a label over 63 chars
+    """
+    assert not valid_hostnames(['x' * 64 + '.example.com'])
+    assert valid_hostnames(['x' * 63 + '.example.com'])